@@ -11,6 +11,10 @@ def main():
     parser.add_argument("--per-page", type=int, default=5)
     parser.add_argument("--dry-run", dest="dry_run", choices=["auto","true","false"], default="auto",
                         help="auto=usar JSON; true/false anula el valor del JSON")
+    parser.add_argument("--registrar", action="store_true",
+                        help="Anade los resultados al registro JSONL del servicio/consulta.")
+    parser.add_argument("--exportar", default=None,
+                        help="Exporta el registro del servicio/consulta a .jsonl o .parquet.")
     args = parser.parse_args()
 
     config = cargar_config(args.json)
@@ -22,7 +26,8 @@ def main():
     elif args.dry_run == "false":
         dry_override = False
 
-    result = banco.search(args.query, per_page=args.per_page, dry_run=dry_override)
+    result = banco.search(args.query, per_page=args.per_page, dry_run=dry_override,
+                          registrar=args.registrar)
 
     if result.get("dry"):
         print(f"[{result['service']}] (dry=True)")
@@ -39,5 +44,13 @@ def main():
             if sp:
                 print(f"- {sp}")
 
+    if args.exportar:
+        registro = banco.registro(args.query)
+        if args.exportar.lower().endswith(".parquet"):
+            n = registro.exportar_parquet(args.exportar)
+        else:
+            n = registro.exportar_jsonl(args.exportar)
+        print(f"Exportados {n} resultados a {args.exportar}")
+
 if __name__ == "__main__":
     main()
@@ -4,8 +4,9 @@
 
 from flask import Flask, request, render_template_string, send_from_directory, Response, url_for
 from pathlib import Path
-from modulos.bancos_imagenes import cargar_config, crear_banco_desde_config
-from modulos.galeria import generate_gallery
+from modulos.bancos_imagenes import (cargar_config, crear_banco_desde_config, buscar_mejor_disponible,
+                                     SERVICIOS, MEJOR_DISPONIBLE)
+from modulos.salud import SALUD
 import json as _json
 
 app = Flask(__name__)
@@ -131,12 +132,14 @@ INDEX = """
         <div class="card">
           {% if it.saved_path %}
             <a href="{{ it.page_url or '#' }}" target="_blank" rel="noopener">
-              <img class="img-thumb" src="{{ url_for('media', filename=it.saved_path) }}" loading="lazy" alt="">
+              <img class="img-thumb" src="{{ url_for('media', filename=it.saved_path) }}" loading="lazy" alt=""
+                   {% if it.width and it.height %}width="{{ it.width }}" height="{{ it.height }}"{% endif %}
+                   style="background: {{ it.color or '#111318' }}">
             </a>
           {% endif %}
           <div class="card-body">
             <div class="d-flex flex-wrap gap-2 align-items-center">
-              <span class="badge text-bg-secondary">{{ serv }}</span>
+              <span class="badge text-bg-secondary">{{ servicio_res or serv }}</span>
               {% if it.author %}<span class="badge text-bg-dark">autor: {{ it.author }}</span>{% endif %}
               {% if it.license %}<span class="badge text-bg-info">lic: {{ it.license }}</span>{% endif %}
               {% if it.page_url %}<a class="btn btn-sm btn-outline-light ms-auto" href="{{ it.page_url }}" target="_blank">Ver página</a>{% endif %}
@@ -173,7 +176,7 @@ def render_page(content_tpl: str, **context):
 
 @app.route("/")
 def home():
-    servicios = ["unsplash", "pexels", "pixabay", "openverse", "wikimedia"]
+    servicios = SERVICIOS + [MEJOR_DISPONIBLE]
     serv = request.args.get("serv", "unsplash")
     q = request.args.get("q", "gato")
     try:
@@ -183,7 +186,6 @@ def home():
     mode = request.args.get("mode", "auto")
 
     cfg = cargar_config("bancos_imagenes.json")
-    banco = crear_banco_desde_config(cfg, serv)
 
     dry_override = None
     if mode == "real":
@@ -192,7 +194,11 @@ def home():
         dry_override = True
 
     try:
-        res = banco.search(q, per_page=n, dry_run=dry_override)
+        if serv == MEJOR_DISPONIBLE:
+            res = buscar_mejor_disponible(cfg, q, per_page=n, dry_run=dry_override)
+        else:
+            banco = crear_banco_desde_config(cfg, serv)
+            res = banco.search(q, per_page=n, dry_run=dry_override)
     except Exception as e:
         return render_page(INDEX, servicios=servicios, serv=serv, q=q, n=n, mode=mode,
                            dry=False, items=[], error=str(e), active="buscar", title="Buscador de imágenes")
@@ -204,8 +210,14 @@ def home():
     else:
         return render_page(INDEX, servicios=servicios, serv=serv, q=q, n=n, mode=mode,
                            dry=False, items=res.get("results", []), error=None, active="buscar",
+                           servicio_res=res.get("service"),
                            title="Buscador de imágenes")
 
+# Latencias, tasa de error y circuit breakers por proveedor
+@app.route("/salud")
+def salud():
+    return Response(_json.dumps(SALUD.resumen(), indent=2), mimetype="application/json")
+
 # Sirve ficheros de la carpeta descargas
 @app.route("/media/<path:filename>")
 def media(filename):
@@ -229,6 +241,7 @@ def descargas(filename):
 
 @app.route("/galeria_raw")
 def galeria_raw():
+    from modulos.galeria import generate_gallery
     service = request.args.get("service")
     out = generate_gallery(descargas_dir="descargas", output_html="galeria.html",
                            service=service, title="Galería")
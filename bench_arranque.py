@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# bench_arranque.py — mide el arranque en frio del backend y vigila regresiones
+# python bench_arranque.py [--runs 15] [--max-ms 150]
+#
+# Comprueba en un directorio temporal (proceso nuevo por ejecucion) que:
+# - importar modulos.bancos_imagenes no carga requests ni concurrent.futures,
+# - no se crea descargas/ al importar,
+# - la mediana de "python app.py --servicio X --dry-run true" no supera --max-ms.
+# Sale con codigo 1 si algo falla.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent
+PESADOS = ["requests", "concurrent.futures", "sqlite3", "flask", "streamlit"]
+
+SONDA = """
+import sys, json, time
+t0 = time.perf_counter()
+import modulos.bancos_imagenes
+ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({"ms": ms, "cargados": [m for m in %r if m in sys.modules]}))
+""" % (PESADOS,)
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(RAIZ) + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+def medir_import(cwd):
+    out = subprocess.run([sys.executable, "-c", SONDA], cwd=cwd, env=_env(),
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+def medir_cli(cwd, servicio):
+    cfg = Path(cwd) / "bancos_imagenes.json"
+    if not cfg.exists():
+        cfg.write_text(json.dumps({servicio: {"dry": True}}), encoding="utf-8")
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, str(RAIZ / "app.py"), "--json", str(cfg),
+                    "--servicio", servicio, "--dry-run", "true"],
+                   cwd=cwd, env=_env(), capture_output=True, check=True)
+    return (time.perf_counter() - t0) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frio del CLI.")
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=150.0,
+                        help="Mediana maxima admitida para el CLI en modo dry (ms).")
+    parser.add_argument("--servicio", default="wikimedia")
+    args = parser.parse_args()
+
+    fallos = []
+    with tempfile.TemporaryDirectory() as tmp:
+        imports, cli = [], []
+        for _ in range(args.runs):
+            r = medir_import(tmp)
+            imports.append(r["ms"])
+            if r["cargados"]:
+                fallos.append(f"importar el backend carga: {', '.join(r['cargados'])}")
+                break
+        if (Path(tmp) / "descargas").exists():
+            fallos.append("importar el backend crea descargas/")
+        for _ in range(args.runs):
+            cli.append(medir_cli(tmp, args.servicio))
+
+    med_imp = statistics.median(imports)
+    med_cli = statistics.median(cli)
+    print(f"import modulos.bancos_imagenes: mediana {med_imp:.1f} ms")
+    print(f"app.py --dry-run true         : mediana {med_cli:.1f} ms (limite {args.max_ms:.0f} ms)")
+    if med_cli > args.max_ms:
+        fallos.append(f"arranque del CLI {med_cli:.1f} ms > {args.max_ms:.0f} ms")
+
+    for f in fallos:
+        print("REGRESION:", f)
+    sys.exit(1 if fallos else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# bench_resultados.py — memoria por resultado: dicts vs TablaResultados
+# python bench_resultados.py [--filas 100000] [--min-ratio 10]
+#
+# Genera filas parecidas a las de los proveedores, las serializa como en el
+# registro JSONL y mide con tracemalloc (cadenas incluidas) lo que ocupa
+# cargarlas como lista de dicts, como Resultado y como TablaResultados.
+# Sale con codigo 1 si la tabla no ahorra al menos --min-ratio veces.
+
+import argparse
+import json
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from modulos.resultados import Resultado, TablaResultados
+
+AUTORES = [f"Autor {i}" for i in range(5000)]
+LICENCIAS = ["Pexels License", "Pixabay License", "by-4.0", "by-sa-4.0", "cc0-1.0"]
+
+def fila(i, rnd):
+    pid = rnd.randint(10**6, 10**8)
+    return {
+        "id": pid,
+        "preview_url": f"https://images.pexels.com/photos/{pid}/pexels-photo-{pid}.jpeg?auto=compress&cs=tinysrgb&h=350",
+        "page_url": f"https://www.pexels.com/photo/foto-{pid}/",
+        "author": rnd.choice(AUTORES),
+        "license": rnd.choice(LICENCIAS),
+        "saved_path": f"descargas/pexels/{pid}.jpg",
+        "format": "jpeg",
+        "width": rnd.randint(200, 1200),
+        "height": rnd.randint(200, 1200),
+        "color": "#%06x" % rnd.randrange(1 << 24),
+    }
+
+def medir(lineas, construir):
+    tracemalloc.start()
+    obj = construir(lineas)
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return actual / len(lineas)
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria por resultado (dict vs columnar).")
+    parser.add_argument("--filas", type=int, default=100000)
+    parser.add_argument("--min-ratio", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    lineas = [json.dumps(fila(i, rnd), ensure_ascii=False) for i in range(args.filas)]
+
+    b_dict = medir(lineas, lambda ls: [json.loads(l) for l in ls])
+    b_res = medir(lineas, lambda ls: [Resultado.desde_dict(json.loads(l)) for l in ls])
+    b_tabla = medir(lineas, lambda ls: TablaResultados(json.loads(l) for l in ls))
+    ratio = b_dict / b_tabla
+
+    print(f"dicts           : {b_dict:7.1f} B/fila")
+    print(f"Resultado       : {b_res:7.1f} B/fila ({b_dict / b_res:.1f}x)")
+    print(f"TablaResultados : {b_tabla:7.1f} B/fila ({ratio:.1f}x, minimo {args.min_ratio:.0f}x)")
+    print(f"por millon      : {b_dict:.0f} MB -> {b_tabla:.0f} MB")
+    sys.exit(0 if ratio >= args.min_ratio else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,13 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 from pathlib import Path
-from modulos.bancos_imagenes import cargar_config, crear_banco_desde_config
-from modulos.galeria import generate_gallery
+from modulos.bancos_imagenes import SERVICIOS, MEJOR_DISPONIBLE
 
 st.set_page_config(page_title="Buscador de Imagenes", layout="wide")
 st.title("Buscador de imagenes — Frontend (usa tu modulo como backend)")
 
 cfg_path = st.text_input("Ruta del JSON de configuracion", "bancos_imagenes.json")
-servicios = ["unsplash", "pexels", "pixabay", "openverse", "wikimedia"]
+servicios = SERVICIOS + [MEJOR_DISPONIBLE]
 
 col1, col2, col3 = st.columns([2,1,1])
 with col1:
@@ -27,16 +26,20 @@ with c2:
     make_gallery = st.button("Generar galeria HTML")
 
 if run:
+    from modulos.bancos_imagenes import cargar_config, crear_banco_desde_config, buscar_mejor_disponible
     try:
         config = cargar_config(cfg_path)
-        banco = crear_banco_desde_config(config, servicio)
         dry_override = None
         if dry_mode == "forzar real":
             dry_override = False
         elif dry_mode == "forzar dry":
             dry_override = True
         with st.spinner("Buscando..."):
-            result = banco.search(query, per_page=int(per_page), dry_run=dry_override)
+            if servicio == MEJOR_DISPONIBLE:
+                result = buscar_mejor_disponible(config, query, per_page=int(per_page), dry_run=dry_override)
+            else:
+                banco = crear_banco_desde_config(config, servicio)
+                result = banco.search(query, per_page=int(per_page), dry_run=dry_override)
         if result.get("dry"):
             st.subheader("Vista dry (no llama a internet)")
             st.json({
@@ -46,7 +49,7 @@ if run:
             })
         else:
             items = result.get("results", [])
-            st.subheader(f"Resultados: {len(items)} (mostrando miniaturas guardadas)")
+            st.subheader(f"Resultados de {result['service']}: {len(items)} (mostrando miniaturas guardadas)")
             cols = st.columns(3)
             for i, it in enumerate(items):
                 with cols[i % 3]:
@@ -62,6 +65,7 @@ if run:
         st.error(str(e))
 
 if make_gallery:
+    from modulos.galeria import generate_gallery
     try:
         out = generate_gallery(descargas_dir="descargas", output_html="galeria.html", service=None, embed_data_uris=True)
         st.success(f"Galeria generada: {out}")
@@ -8,17 +8,32 @@ Openverse con OAuth2 client_credentials:
 - Token se solicita en __init__ si default_dry=False y se renueva automaticamente.
 
 Otros proveedores mantienen el comportamiento previo.
+
+Cada search() real registra latencia y errores en modulos.salud.SALUD;
+buscar_mejor_disponible() usa esa salud para enrutar (y cubrir con una
+peticion de respaldo) hacia los proveedores mas rapidos y sanos.
+
+Arranque rapido: requests y concurrent.futures se importan al primer uso y
+el modulo no toca el disco al importarse (descargas/ se crea al descargar).
+
+Con varios procesos (gunicorn) los tokens OAuth, la cache de busquedas y las
+descargas en curso se coordinan con modulos.estado_compartido: cada URL se
+descarga una sola vez y el fichero se escribe de forma atomica.
 """
 
 import os
 import json
 import pathlib
-import hashlib
 import time
-import requests
+from modulos.resultados import Resultado, RegistroResultados
+from modulos.salud import SALUD
+from modulos.metadatos import EXTENSIONES, detectar_formato, procesar_archivos, ya_indexadas
+from modulos.estado_compartido import estado
 
 DESCARGAS_DIR = pathlib.Path("descargas")
-DESCARGAS_DIR.mkdir(exist_ok=True)
+
+SERVICIOS = ["unsplash", "pexels", "pixabay", "openverse", "wikimedia"]
+MEJOR_DISPONIBLE = "mejor"
 
 def _slug(s, maxlen=60):
     s = "".join(ch if ch.isalnum() else "-" for ch in str(s))
@@ -29,23 +44,47 @@ def _slug(s, maxlen=60):
 def _filename_for_item(item):
     base = item.get("id")
     if not base:
+        import hashlib
         pu = item.get("preview_url", "")
         base = hashlib.sha1(pu.encode("utf-8")).hexdigest()[:12] if pu else "img"
     return f"{_slug(base)}.jpg"
 
+def ruta_registro(servicio, query):
+    return DESCARGAS_DIR / "_registro" / servicio / f"{_slug(query)}.jsonl"
+
+def _ya_descargada(destino):
+    for ext in [destino.suffix] + list(EXTENSIONES.values()):
+        if destino.with_suffix(ext).exists():
+            return destino.with_suffix(ext)
+    return None
+
 def _download_image(url, carpeta, nombre):
     carpeta = pathlib.Path(carpeta)
     carpeta.mkdir(parents=True, exist_ok=True)
     destino = carpeta / nombre
-    if destino.exists():
-        return str(destino)
-    r = requests.get(url, timeout=20, headers={"User-Agent": "MasterIA3D-Downloader/1.0"})
-    r.raise_for_status()
-    with open(destino, "wb") as f:
-        f.write(r.content)
+    previa = _ya_descargada(destino)
+    if previa:
+        return str(previa)
+    with estado().bloqueo(f"descarga:{carpeta.resolve() / destino.stem}"):
+        previa = _ya_descargada(destino)
+        if previa:
+            return str(previa)
+        import requests
+        r = requests.get(url, timeout=20, headers={"User-Agent": "MasterIA3D-Downloader/1.0"})
+        r.raise_for_status()
+        ext = EXTENSIONES.get(detectar_formato(r.content[:16]))
+        if ext:
+            destino = destino.with_suffix(ext)
+        tmp = carpeta / f".{destino.name}.{os.getpid()}.part"
+        with open(tmp, "wb") as f:
+            f.write(r.content)
+        os.replace(tmp, destino)
     return str(destino)
 
 class BancoImagenes:
+    cache_ttl = 300
+    clave_config = None
+
     def __init__(self, access_key, base_url, default_dry=True):
         self.access_key = access_key or ""
         self.base_url = base_url
@@ -60,6 +99,10 @@ class BancoImagenes:
     def servicio_nombre(self):
         return type(self).__name__.replace("API", "").lower()
 
+    def servicio_salud(self):
+        # SALUD y /salud usan el mismo nombre que SERVICIOS y el JSON
+        return self.clave_config or self.servicio_nombre()
+
     def _dedup(self, items):
         seen = set()
         out = []
@@ -71,17 +114,63 @@ class BancoImagenes:
             out.append(it)
         return out
 
-    def search(self, query, per_page=5, dry_run=None):
+    def _anotar_metadatos(self, items):
+        guardados = [it for it in items if it.get("saved_path")]
+        if not guardados:
+            return
+        metas, pendientes = ya_indexadas(it["saved_path"] for it in guardados)
+        error = None
+        try:
+            metas.update(procesar_archivos(pendientes))
+        except OSError as e:
+            # incluye el TimeoutError del bloqueo del indice: las imagenes ya estan descargadas
+            error = f"metadatos: {e}"
+        for it in guardados:
+            final, meta = metas.get(pathlib.Path(it["saved_path"]), (None, None))
+            if meta is None:
+                if error:
+                    it["download_error"] = error
+                continue
+            it["saved_path"] = str(final)
+            for campo in ("format", "width", "height", "color"):
+                it[campo] = meta.get(campo)
+
+    def _pedir(self, url, headers, params):
+        import requests
+        t0 = time.monotonic()
+        try:
+            r = requests.get(url, headers=headers, params=params, timeout=25)
+            r.raise_for_status()
+            data = r.json()
+        except Exception:
+            SALUD.registrar(self.servicio_salud(), time.monotonic() - t0, False)
+            raise
+        SALUD.registrar(self.servicio_salud(), time.monotonic() - t0, True)
+        return data
+
+    def registro(self, query):
+        return RegistroResultados(ruta_registro(self.servicio_nombre(), query))
+
+    def search(self, query, per_page=5, dry_run=None, registrar=False):
         if dry_run is None:
             dry_run = self.default_dry
         url, headers, params = self.build_request(query, per_page)
         if dry_run:
             return {"service": type(self).__name__, "url": url, "headers": headers, "params": params, "dry": True}
-        r = requests.get(url, headers=headers, params=params, timeout=25)
-        r.raise_for_status()
-        data = r.json()
+        return self._resultados(query, self._payload(url, headers, params), registrar)
+
+    def _payload(self, url, headers, params):
+        if not self.cache_ttl:
+            return self._pedir(url, headers, params)
+        import hashlib
+        # params puede llevar credenciales (p.ej. key de Pixabay): solo se guarda su hash
+        firma = json.dumps([self.servicio_nombre(), url, params], sort_keys=True, default=str)
+        clave = "busqueda:" + hashlib.sha256(firma.encode("utf-8")).hexdigest()
+        return estado().una_sola_vez(clave, lambda: self._pedir(url, headers, params), self.cache_ttl)
+
+    def _resultados(self, query, data, registrar=False):
         items = self.parse_response(data)
-        items = self._dedup(items)
+        items = [Resultado.desde_dict(it) for it in self._dedup(items)]
         carpeta = DESCARGAS_DIR / self.servicio_nombre()
         for it in items:
             pu = it.get("preview_url")
@@ -92,9 +181,13 @@ class BancoImagenes:
                 except Exception as e:
                     it["saved_path"] = None
                     it["download_error"] = str(e)
+        self._anotar_metadatos(items)
+        if registrar:
+            self.registro(query).append(items)
         return {"service": type(self).__name__, "results": items, "dry": False}
 
 class PexelsAPI(BancoImagenes):
+    clave_config = "pexels"
     def __init__(self, access_key, base_url="https://api.pexels.com/v1", default_dry=True):
         super().__init__(access_key, base_url, default_dry)
     def build_request(self, query, per_page=5):
@@ -115,6 +208,7 @@ class PexelsAPI(BancoImagenes):
         return out
 
 class PixabayAPI(BancoImagenes):
+    clave_config = "pixabay"
     def __init__(self, access_key, base_url="https://pixabay.com/api/", default_dry=True):
         super().__init__(access_key, base_url, default_dry)
     def build_request(self, query, per_page=5):
@@ -135,6 +229,7 @@ class PixabayAPI(BancoImagenes):
         return out
 
 class UnsplashAPI(BancoImagenes):
+    clave_config = "unsplash"
     def __init__(self, access_key, base_url="https://api.unsplash.com", default_dry=True):
         super().__init__(access_key, base_url, default_dry)
     def build_request(self, query, per_page=5):
@@ -158,6 +253,7 @@ class UnsplashAPI(BancoImagenes):
         return out
 
 class OpenverseAPI(BancoImagenes):
+    clave_config = "openverse"
     def __init__(self, access_key="", base_url="https://api.openverse.org", default_dry=True,
                  client_id=None, client_secret_env=None, token_url="https://api.openverse.org/v1/auth_tokens/token/"):
         super().__init__(access_key, base_url, default_dry)
@@ -186,14 +282,22 @@ class OpenverseAPI(BancoImagenes):
         secret = self._get_client_secret()
         if not (self.client_id and secret):
             return
-        data = {"grant_type":"client_credentials","client_id":self.client_id,"client_secret":secret}
-        r = requests.post(self.token_url, data=data, timeout=20)
-        r.raise_for_status()
-        payload = r.json()
-        self._token = payload.get("access_token")
-        exp = int(payload.get("expires_in", 8*3600))
-        self._token_expiry = time.time() + max(60, exp)
+        def pedir():
+            import requests
+            data = {"grant_type":"client_credentials","client_id":self.client_id,"client_secret":secret}
+            r = requests.post(self.token_url, data=data, timeout=20)
+            r.raise_for_status()
+            payload = r.json()
+            exp = int(payload.get("expires_in", 8*3600))
+            return {"access_token": payload.get("access_token"), "expira": time.time() + max(60, exp)}
+        tok = estado().una_sola_vez(self._clave_token(), pedir,
+                                    ttl=lambda v: max(1, v["expira"] - time.time() - 60))
+        self._token = tok["access_token"]
+        self._token_expiry = tok["expira"]
+    def _clave_token(self):
+        return f"token:openverse:{self.token_url}:{self.client_id}"
     def refresh_token(self):
+        estado().delete(self._clave_token())
         self._request_token()
     def build_request(self, query, per_page=5):
         self._ensure_token()
@@ -216,6 +320,7 @@ class OpenverseAPI(BancoImagenes):
         return out
 
 class WikimediaCommonsAPI(BancoImagenes):
+    clave_config = "wikimedia"
     def __init__(self, base_url="https://commons.wikimedia.org/w/api.php", default_dry=True, user_agent=None):
         super().__init__(access_key="", base_url=base_url, default_dry=default_dry)
         self.user_agent = user_agent or "victor (mailto:vicgarpe@uchceu.es)"
@@ -280,3 +385,78 @@ def crear_banco_desde_config(config, servicio):
         ua = entry.get("user_agent")
         return WikimediaCommonsAPI(base_url or "https://commons.wikimedia.org/w/api.php", default_dry, user_agent=ua)
     raise ValueError(f"Servicio no soportado: {servicio}")
+
+def buscar_mejor_disponible(config, query, per_page=5, dry_run=None, registrar=False,
+                            servicios=None, hedge=2, espera_hedge=None):
+    """Busca en el proveedor sano mas rapido segun SALUD.
+
+    Solo se cubre la llamada a la API: si no responde antes de su p95 (o
+    espera_hedge segundos) se lanza en paralelo el siguiente, hasta 'hedge'
+    peticiones a la vez. Gana la primera respuesta correcta y solo el ganador
+    descarga imagenes; las demas respuestas se descartan. Los fallos pasan al
+    siguiente candidato.
+
+    Se respeta el "dry" de cada proveedor: con dry_run=None solo compiten los
+    reales y la vista dry se devuelve solo si todos son dry; un dry_run
+    forzado se aplica a todos por igual.
+    """
+    bancos = {}
+    errores = []
+    for s in (servicios or SERVICIOS):
+        if s not in config:
+            continue
+        try:
+            b = crear_banco_desde_config(config, s)
+        except Exception as e:
+            errores.append(f"{s}: {e}")
+            continue
+        bancos[b.servicio_salud()] = b
+    if not bancos:
+        raise RuntimeError("Ningun proveedor disponible" + (": " + "; ".join(errores) if errores else ""))
+
+    reales = [s for s, b in bancos.items() if not (b.default_dry if dry_run is None else dry_run)]
+    if not reales:
+        primero = bancos[(SALUD.ordenar(list(bancos)) or list(bancos))[0]]
+        return primero.search(query, per_page=per_page, dry_run=dry_run, registrar=registrar)
+    candidatos = SALUD.ordenar(reales)
+    if not candidatos:
+        raise RuntimeError("Ningun proveedor disponible" + (": " + "; ".join(errores) if errores else ""))
+
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    espera = espera_hedge
+    def consulta(b):
+        url, headers, params = b.build_request(query, per_page)
+        return b._payload(url, headers, params)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, hedge))
+    pendientes = {}
+    siguiente = 0
+    ganador = None
+    try:
+        while ganador is None:
+            while siguiente < len(candidatos) and len(pendientes) < max(1, hedge):
+                b = bancos[candidatos[siguiente]]
+                siguiente += 1
+                if SALUD.reservar(b.servicio_salud()):
+                    pendientes[pool.submit(consulta, b)] = b
+                    if espera_hedge is None:
+                        espera = SALUD.percentil(b.servicio_salud(), 95) or 2.0
+                    break
+            if not pendientes:
+                break
+            puede_cubrir = siguiente < len(candidatos) and len(pendientes) < max(1, hedge)
+            hechos, _ = wait(pendientes, timeout=espera if puede_cubrir else None,
+                             return_when=FIRST_COMPLETED)
+            for f in hechos:
+                b = pendientes.pop(f)
+                try:
+                    ganador = (b, f.result())
+                    break
+                except Exception as e:
+                    errores.append(f"{b.servicio_salud()}: {e}")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    if ganador is None:
+        raise RuntimeError("Ningun proveedor respondio: " + "; ".join(errores))
+    b, data = ganador
+    return b._resultados(query, data, registrar)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+modulos/estado_compartido.py
+
+Estado compartido entre procesos (p.ej. varios workers de gunicorn) sobre
+un SQLite local en modo WAL:
+- clave/valor JSON con caducidad (tokens OAuth, cache de busquedas).
+- bloqueos con nombre entre procesos (single-flight de descargas).
+- una_sola_vez(): si falta el valor, solo un proceso lo calcula y el resto
+  espera y lo reutiliza.
+
+La base se crea al primer uso en .estado/estado.sqlite (o en la ruta de la
+variable de entorno ESTADO_DB), fuera de descargas/ porque esa carpeta se
+sirve por HTTP y aqui se guardan tokens.
+"""
+
+import json
+import os
+import pathlib
+import threading
+import time
+from contextlib import contextmanager
+
+class EstadoCompartido:
+    def __init__(self, ruta=None):
+        self.ruta = pathlib.Path(ruta or os.getenv("ESTADO_DB") or ".estado/estado.sqlite")
+        self._local = threading.local()
+
+    def _conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None or self._local.pid != os.getpid():
+            import sqlite3
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            c = sqlite3.connect(str(self.ruta), timeout=30, isolation_level=None)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA busy_timeout=30000")
+            c.execute("CREATE TABLE IF NOT EXISTS kv (clave TEXT PRIMARY KEY, valor TEXT, expira REAL)")
+            c.execute("CREATE TABLE IF NOT EXISTS bloqueos (nombre TEXT PRIMARY KEY, dueno TEXT, expira REAL)")
+            self._local.conn = c
+            self._local.pid = os.getpid()
+        return c
+
+    def get(self, clave, default=None):
+        fila = self._conn().execute("SELECT valor, expira FROM kv WHERE clave=?", (clave,)).fetchone()
+        if fila is None or (fila[1] is not None and fila[1] < time.time()):
+            return default
+        return json.loads(fila[0])
+
+    def set(self, clave, valor, ttl=None):
+        expira = time.time() + ttl if ttl else None
+        self._conn().execute("INSERT OR REPLACE INTO kv (clave, valor, expira) VALUES (?, ?, ?)",
+                             (clave, json.dumps(valor, ensure_ascii=False), expira))
+
+    def delete(self, clave):
+        self._conn().execute("DELETE FROM kv WHERE clave=?", (clave,))
+
+    def purgar(self):
+        self._conn().execute("DELETE FROM kv WHERE expira IS NOT NULL AND expira<?", (time.time(),))
+
+    @contextmanager
+    def bloqueo(self, nombre, timeout=60.0, ttl=120.0):
+        """Bloqueo entre procesos; 'ttl' libera bloqueos de procesos muertos."""
+        dueno = f"{os.getpid()}:{threading.get_ident()}:{time.monotonic_ns()}"
+        limite = time.monotonic() + timeout
+        espera = 0.01
+        while True:
+            c = self._conn()
+            ahora = time.time()
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                c.execute("DELETE FROM bloqueos WHERE nombre=? AND expira<?", (nombre, ahora))
+                cur = c.execute("INSERT OR IGNORE INTO bloqueos (nombre, dueno, expira) VALUES (?, ?, ?)",
+                                (nombre, dueno, ahora + ttl))
+                c.execute("COMMIT")
+            except Exception:
+                c.execute("ROLLBACK")
+                raise
+            if cur.rowcount == 1:
+                break
+            if time.monotonic() > limite:
+                raise TimeoutError(f"No se pudo obtener el bloqueo: {nombre}")
+            time.sleep(espera)
+            espera = min(espera * 2, 0.25)
+        try:
+            yield
+        finally:
+            self._conn().execute("DELETE FROM bloqueos WHERE nombre=? AND dueno=?", (nombre, dueno))
+
+    def una_sola_vez(self, clave, calcular, ttl=None):
+        """Devuelve el valor de 'clave'; si no esta, lo calcula un solo proceso.
+
+        'ttl' puede ser un numero de segundos o una funcion del valor calculado.
+        """
+        v = self.get(clave)
+        if v is not None:
+            return v
+        with self.bloqueo(f"calc:{clave}"):
+            v = self.get(clave)
+            if v is None:
+                self.purgar()
+                v = calcular()
+                self.set(clave, v, ttl(v) if callable(ttl) else ttl)
+        return v
+
+_ESTADO = None
+
+def estado():
+    global _ESTADO
+    if _ESTADO is None:
+        _ESTADO = EstadoCompartido()
+    return _ESTADO
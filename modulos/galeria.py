@@ -1,9 +1,8 @@
 # -*- coding: utf-8 -*-
 from pathlib import Path
 from typing import Iterable, Optional
-import os, base64, mimetypes
-
-IMG_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+import os
+from modulos.metadatos import IMG_EXTS, cargar_indice
 
 HTML_TEMPLATE_DARK = """<!doctype html>
 <html lang="es" data-bs-theme="dark">
@@ -60,7 +59,7 @@ HTML_TEMPLATE_LIGHT = """<!doctype html>
 </html>"""
 
 CARD = """<div class="card">
-  <img src="{src}" alt="">
+  <img src="{src}" alt="" loading="lazy"{dims} style="background:{color}">
   <div class="meta">
     <div class="service">{service}</div>
     <div class="muted">{relpath}</div>
@@ -82,6 +81,7 @@ def _iter_images(descargas_dir: Path, service: Optional[str]):
                 yield p
 
 def _to_data_uri(path: Path) -> str:
+    import base64, mimetypes
     try:
         mime, _ = mimetypes.guess_type(path.name)
         if not mime:
@@ -102,6 +102,7 @@ def generate_gallery(descargas_dir: str = "descargas", output_html: str = "galer
     if not title:
         title = "Galeria de imagenes" + (f" – {service}" if service else "")
 
+    indices = {}
     cards = []
     for img in images:
         ip = img.resolve()
@@ -121,7 +122,16 @@ def generate_gallery(descargas_dir: str = "descargas", output_html: str = "galer
             service_name = "desconocido"
             rel_inside_desc = ip.name
 
+        if ip.parent not in indices:
+            indices[ip.parent] = cargar_indice(ip.parent)
+        meta = indices[ip.parent].get(ip.name) or {}
+        dims = ""
+        if meta.get("width") and meta.get("height"):
+            dims = f' width="{meta["width"]}" height="{meta["height"]}"'
+
         cards.append(CARD.format(src=str(src).replace("\\","/"),
+                                 dims=dims,
+                                 color=meta.get("color") or ("#111" if dark else "#eee"),
                                  service=service_name,
                                  relpath=rel_inside_desc))
 
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+modulos/metadatos.py
+
+Etapa posterior a la descarga:
+- formato real por "magic bytes" (jpeg/png/gif/webp) y extension corregida.
+- dimensiones leidas de la cabecera (sin decodificar la imagen).
+- EXIF y color dominante si Pillow esta instalado (opcional).
+- indice por carpeta en <carpeta>/_metadatos.json que usan la galeria y Flask.
+
+Se procesa por lotes en paralelo. Backfill de una biblioteca existente:
+    python -m modulos.metadatos --descargas descargas --workers 8
+"""
+
+import json
+import os
+import pathlib
+import struct
+from modulos.estado_compartido import estado
+
+INDICE = "_metadatos.json"
+EXTENSIONES = {"jpeg": ".jpg", "png": ".png", "gif": ".gif", "webp": ".webp"}
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+_CABECERA = 256 * 1024
+_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def detectar_formato(datos):
+    if datos[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if datos[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if datos[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if datos[:4] == b"RIFF" and datos[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+def _dimensiones_jpeg(d):
+    i = 2
+    while i + 9 < len(d):
+        if d[i] != 0xFF:
+            i += 1
+            continue
+        marcador = d[i + 1]
+        if marcador == 0xFF:
+            i += 1
+            continue
+        if marcador in (0xD8, 0x01) or 0xD0 <= marcador <= 0xD7:
+            i += 2
+            continue
+        if marcador in _SOF:
+            alto, ancho = struct.unpack(">HH", d[i + 5:i + 9])
+            return ancho, alto
+        i += 2 + struct.unpack(">H", d[i + 2:i + 4])[0]
+    return None
+
+def _dimensiones_webp(d):
+    chunk = d[12:16]
+    if chunk == b"VP8 " and len(d) >= 30:
+        ancho, alto = struct.unpack("<HH", d[26:30])
+        return ancho & 0x3FFF, alto & 0x3FFF
+    if chunk == b"VP8L" and len(d) >= 25:
+        b0, b1, b2, b3 = d[21:25]
+        return 1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+    if chunk == b"VP8X" and len(d) >= 30:
+        return 1 + int.from_bytes(d[24:27], "little"), 1 + int.from_bytes(d[27:30], "little")
+    return None
+
+def dimensiones(datos, formato=None):
+    formato = formato or detectar_formato(datos)
+    try:
+        if formato == "png":
+            return struct.unpack(">II", datos[16:24])
+        if formato == "gif":
+            return struct.unpack("<HH", datos[6:10])
+        if formato == "jpeg":
+            return _dimensiones_jpeg(datos)
+        if formato == "webp":
+            return _dimensiones_webp(datos)
+    except struct.error:
+        pass
+    return None
+
+def _pil():
+    try:
+        from PIL import Image, ExifTags
+    except ImportError:
+        return None, None
+    return Image, ExifTags
+
+def _exif_y_color(ruta):
+    Image, ExifTags = _pil()
+    if Image is None:
+        return {}, None
+    try:
+        with Image.open(ruta) as im:
+            exif = {}
+            for k, v in im.getexif().items():
+                if isinstance(v, bytes):
+                    continue
+                exif[ExifTags.TAGS.get(k, str(k))] = v if isinstance(v, (int, float, str)) else str(v)
+            im.draft("RGB", (64, 64))
+            im = im.convert("RGB")
+            im.thumbnail((32, 32))
+            q = im.quantize(colors=5)
+            paleta = q.getpalette()
+            _, idx = max(q.getcolors())
+            r, g, b = paleta[idx * 3:idx * 3 + 3]
+            return exif, f"#{r:02x}{g:02x}{b:02x}"
+    except Exception:
+        return {}, None
+
+def extraer_metadatos(ruta):
+    ruta = pathlib.Path(ruta)
+    with open(ruta, "rb") as f:
+        cabecera = f.read(_CABECERA)
+    formato = detectar_formato(cabecera)
+    dims = dimensiones(cabecera, formato)
+    exif, color = _exif_y_color(ruta)
+    return {
+        "size": ruta.stat().st_size,
+        "format": formato,
+        "width": dims[0] if dims else None,
+        "height": dims[1] if dims else None,
+        "color": color,
+        "exif": exif,
+    }
+
+def corregir_extension(ruta, formato):
+    """Renombra la imagen si su extension no coincide con el formato real."""
+    ruta = pathlib.Path(ruta)
+    ext = EXTENSIONES.get(formato)
+    if not ext or ruta.suffix.lower() == ext or (ext == ".jpg" and ruta.suffix.lower() == ".jpeg"):
+        return ruta
+    nueva = ruta.with_suffix(ext)
+    if nueva.exists():
+        ruta.unlink()
+    else:
+        os.replace(ruta, nueva)
+    return nueva
+
+def cargar_indice(carpeta):
+    p = pathlib.Path(carpeta) / INDICE
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _actualizar_indice(carpeta, nuevos, borrar=()):
+    carpeta = pathlib.Path(carpeta)
+    with estado().bloqueo(f"indice:{carpeta.resolve()}"):
+        indice = cargar_indice(carpeta)
+        for nombre in borrar:
+            indice.pop(nombre, None)
+        indice.update(nuevos)
+        tmp = carpeta / f"{INDICE}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(indice, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, carpeta / INDICE)
+
+def _procesar_uno(ruta):
+    try:
+        meta = extraer_metadatos(ruta)
+        ruta = corregir_extension(ruta, meta["format"])
+    except Exception:
+        return ruta, None
+    return ruta, meta
+
+def ya_indexadas(rutas):
+    """Separa las rutas ya en el indice (mismo nombre y tamano) de las pendientes.
+
+    Devuelve ({ruta: (ruta, metadatos)}, [rutas pendientes]).
+    """
+    hechas, pendientes, indices = {}, [], {}
+    for r in rutas:
+        r = pathlib.Path(r)
+        if r.parent not in indices:
+            indices[r.parent] = cargar_indice(r.parent)
+        meta = indices[r.parent].get(r.name)
+        try:
+            tam = r.stat().st_size
+        except OSError:
+            tam = None
+        if meta and tam is not None and meta.get("size") == tam:
+            hechas[r] = (r, meta)
+        else:
+            pendientes.append(r)
+    return hechas, pendientes
+
+def procesar_archivos(rutas, workers=8, lote=256):
+    """Extrae metadatos de 'rutas' en paralelo y actualiza los indices.
+
+    Devuelve {ruta_original: (ruta_final, metadatos)}; metadatos es None si
+    la imagen no se pudo leer (no se anade al indice).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    rutas = [pathlib.Path(r) for r in rutas]
+    out = {}
+    if not rutas:
+        return out
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(rutas)))) as pool:
+        for i in range(0, len(rutas), lote):
+            bloque = rutas[i:i + lote]
+            por_carpeta = {}
+            for original, (final, meta) in zip(bloque, pool.map(_procesar_uno, bloque)):
+                out[original] = (final, meta)
+                if meta is None:
+                    continue
+                nuevos, borrar = por_carpeta.setdefault(final.parent, ({}, []))
+                nuevos[final.name] = meta
+                if final.name != original.name:
+                    borrar.append(original.name)
+            for carpeta, (nuevos, borrar) in por_carpeta.items():
+                _actualizar_indice(carpeta, nuevos, borrar)
+    return out
+
+def procesar_descargas(descargas_dir="descargas", servicio=None, workers=8, lote=256, forzar=False):
+    """Procesa las imagenes de descargas/ que no esten ya en su indice.
+
+    Con forzar=True se vuelven a procesar todas. Devuelve cuantas se procesaron.
+    """
+    raiz = pathlib.Path(descargas_dir) / (servicio or "")
+    if not raiz.exists():
+        return 0
+    rutas = [p for p in sorted(raiz.rglob("*")) if p.suffix.lower() in IMG_EXTS]
+    if not forzar:
+        _, rutas = ya_indexadas(rutas)
+    return len(procesar_archivos(rutas, workers=workers, lote=lote))
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Backfill de metadatos (formato, dimensiones, EXIF, color).")
+    parser.add_argument("--descargas", default="descargas")
+    parser.add_argument("--servicio", default=None)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--lote", type=int, default=256)
+    parser.add_argument("--forzar", action="store_true",
+                        help="Reprocesa tambien las imagenes ya indexadas.")
+    args = parser.parse_args()
+    n = procesar_descargas(args.descargas, args.servicio, args.workers, args.lote, args.forzar)
+    print(f"Imagenes procesadas: {n}")
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+modulos/resultados.py
+
+Representacion compacta de los resultados de busqueda:
+- Resultado: registro con __slots__ (sin __dict__ por item) que se comporta
+  como el dict que devolvia search(): get, [], in, keys/items, dict(r).
+- TablaResultados: almacenamiento columnar compacto: textos en bloques
+  comprimidos con zlib, categorias (licencia, formato, error) codificadas como
+  enteros y dimensiones en array('i').
+- RegistroResultados: log JSONL de solo-anadir por proveedor/consulta, con
+  exportacion en streaming a JSONL o Parquet (requiere pyarrow).
+"""
+
+import json
+import os
+import pathlib
+import zlib
+from array import array
+
+CAMPOS = ("id", "preview_url", "page_url", "author", "license", "saved_path",
+          "format", "width", "height", "color", "download_error")
+_CAMPOS_CATEGORIAS = ("license", "format", "download_error")
+_CAMPOS_ENTEROS = ("width", "height")
+
+class Resultado:
+    __slots__ = CAMPOS
+
+    def __init__(self, id=None, preview_url=None, page_url=None, author=None,
+                 license=None, saved_path=None, format=None, width=None, height=None,
+                 color=None, download_error=None):
+        self.id = id
+        self.preview_url = preview_url
+        self.page_url = page_url
+        self.author = author
+        self.license = license
+        self.saved_path = saved_path
+        self.format = format
+        self.width = width
+        self.height = height
+        self.color = color
+        self.download_error = download_error
+
+    @classmethod
+    def desde_dict(cls, d):
+        return cls(**{c: d.get(c) for c in CAMPOS})
+
+    def get(self, campo, default=None):
+        if campo not in CAMPOS:
+            return default
+        v = getattr(self, campo)
+        return default if v is None else v
+
+    def __getitem__(self, campo):
+        if campo not in CAMPOS:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+    def __setitem__(self, campo, valor):
+        if campo not in CAMPOS:
+            raise KeyError(campo)
+        setattr(self, campo, valor)
+
+    def __contains__(self, campo):
+        return campo in CAMPOS and (campo != "download_error" or self.download_error is not None)
+
+    def keys(self):
+        return [c for c in CAMPOS if c in self]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(c, getattr(self, c)) for c in self.keys()]
+
+    def to_dict(self):
+        d = {c: getattr(self, c) for c in CAMPOS if c != "download_error"}
+        if self.download_error is not None:
+            d["download_error"] = self.download_error
+        return d
+
+    def __repr__(self):
+        return f"Resultado(id={self.id!r}, preview_url={self.preview_url!r})"
+
+class _ColumnaTexto:
+    """Textos (o ids enteros) en bloques de 'bloque' filas comprimidos con zlib."""
+
+    _NULO, _TEXTO, _ENTERO = 0, 1, 2
+
+    def __init__(self, bloque=1024):
+        self.bloque = bloque
+        self._tipos = bytearray()
+        self._abierto = []
+        self._sellados = []
+        self._cache = (-1, None)
+
+    def append(self, v):
+        if v is None:
+            self._tipos.append(self._NULO)
+            v = ""
+        elif isinstance(v, int) and not isinstance(v, bool):
+            self._tipos.append(self._ENTERO)
+            v = str(v)
+        else:
+            self._tipos.append(self._TEXTO)
+            v = str(v).replace("\x00", "")
+        self._abierto.append(v)
+        if len(self._abierto) == self.bloque:
+            self._sellados.append(zlib.compress("\x00".join(self._abierto).encode("utf-8")))
+            self._abierto = []
+
+    def _bloque(self, n):
+        if n == len(self._sellados):
+            return self._abierto
+        if self._cache[0] != n:
+            self._cache = (n, zlib.decompress(self._sellados[n]).decode("utf-8").split("\x00"))
+        return self._cache[1]
+
+    def __getitem__(self, i):
+        tipo = self._tipos[i]
+        if tipo == self._NULO:
+            return None
+        v = self._bloque(i // self.bloque)[i % self.bloque]
+        return int(v) if tipo == self._ENTERO else v
+
+    def __len__(self):
+        return len(self._tipos)
+
+class _ColumnaCategorias:
+    """Valores repetidos guardados una vez; por fila solo un codigo (0 = None)."""
+
+    def __init__(self):
+        self._valores = [None]
+        self._codigos_por_valor = {}
+        self._codigos = array("I")
+
+    def append(self, v):
+        if v is None:
+            self._codigos.append(0)
+            return
+        codigo = self._codigos_por_valor.get(v)
+        if codigo is None:
+            codigo = self._codigos_por_valor[v] = len(self._valores)
+            self._valores.append(v)
+        self._codigos.append(codigo)
+
+    def __getitem__(self, i):
+        return self._valores[self._codigos[i]]
+
+class _ColumnaEnteros:
+    def __init__(self):
+        self._datos = array("i")
+
+    def append(self, v):
+        self._datos.append(-1 if v is None else int(v))
+
+    def __getitem__(self, i):
+        v = self._datos[i]
+        return None if v < 0 else v
+
+class TablaResultados:
+    def __init__(self, items=(), bloque=1024):
+        self._cols = {}
+        for c in CAMPOS:
+            if c in _CAMPOS_CATEGORIAS:
+                self._cols[c] = _ColumnaCategorias()
+            elif c in _CAMPOS_ENTEROS:
+                self._cols[c] = _ColumnaEnteros()
+            else:
+                self._cols[c] = _ColumnaTexto(bloque)
+        self.extend(items)
+
+    def append(self, item):
+        for c in CAMPOS:
+            self._cols[c].append(item.get(c))
+
+    def extend(self, items):
+        for it in items:
+            self.append(it)
+
+    def columna(self, campo):
+        col = self._cols[campo]
+        return [col[i] for i in range(len(self))]
+
+    def fila(self, i):
+        return Resultado(*(self._cols[c][i] for c in CAMPOS))
+
+    def __len__(self):
+        return len(self._cols["id"])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.fila(i)
+
+class RegistroResultados:
+    """Log JSONL de solo-anadir; una linea por resultado."""
+
+    def __init__(self, ruta):
+        self.ruta = pathlib.Path(ruta)
+
+    def append(self, items):
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        n = 0
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            for it in items:
+                d = it.to_dict() if hasattr(it, "to_dict") else dict(it)
+                f.write(json.dumps(d, ensure_ascii=False) + "\n")
+                n += 1
+        return n
+
+    def leer(self):
+        if not self.ruta.exists():
+            return
+        with open(self.ruta, "r", encoding="utf-8") as f:
+            for linea in f:
+                linea = linea.strip()
+                if linea:
+                    yield Resultado.desde_dict(json.loads(linea))
+
+    def cargar_tabla(self):
+        return TablaResultados(self.leer())
+
+    def exportar_jsonl(self, destino):
+        destino = pathlib.Path(destino)
+        if destino.resolve() == self.ruta.resolve():
+            raise ValueError(f"No se puede exportar el registro sobre si mismo: {destino}")
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+        tmp.unlink(missing_ok=True)
+        n = RegistroResultados(tmp).append(self.leer())
+        os.replace(tmp, destino)
+        return n
+
+    def exportar_parquet(self, destino, lote=50000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Exportar a Parquet requiere pyarrow (pip install pyarrow)") from e
+        destino = pathlib.Path(destino)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        esquema = pa.schema([(c, pa.int32() if c in _CAMPOS_ENTEROS else pa.string()) for c in CAMPOS])
+        n = 0
+        with pq.ParquetWriter(str(destino), esquema) as writer:
+            cols = {c: [] for c in CAMPOS}
+            for r in self.leer():
+                for c in CAMPOS:
+                    v = getattr(r, c)
+                    if v is not None and c not in _CAMPOS_ENTEROS:
+                        v = str(v)
+                    cols[c].append(v)
+                n += 1
+                if len(cols["id"]) >= lote:
+                    writer.write_table(pa.table(cols, schema=esquema))
+                    cols = {c: [] for c in CAMPOS}
+            if cols["id"]:
+                writer.write_table(pa.table(cols, schema=esquema))
+        return n
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+modulos/salud.py
+
+Salud de proveedores medida desde las llamadas reales a search():
+- latencias en ventana deslizante (p50/p95) y tasa de error por proveedor.
+- circuit breaker: tras varios fallos seguidos (o demasiada tasa de error)
+  el proveedor se salta durante un enfriamiento; pasado ese tiempo solo el
+  primero que llame a reservar() pasa como sonda (half-open) y el circuito
+  sigue abierto para el resto hasta que la sonda registre su resultado.
+"""
+
+import time
+import threading
+from collections import deque
+
+class SaludProveedores:
+    def __init__(self, ventana=50, fallos_para_abrir=3, tasa_error_max=0.5,
+                 min_muestras=10, enfriamiento=30.0):
+        self.ventana = ventana
+        self.fallos_para_abrir = fallos_para_abrir
+        self.tasa_error_max = tasa_error_max
+        self.min_muestras = min_muestras
+        self.enfriamiento = enfriamiento
+        self._lock = threading.Lock()
+        self._estado = {}
+
+    def _entrada(self, servicio):
+        e = self._estado.get(servicio)
+        if e is None:
+            e = {"latencias": deque(maxlen=self.ventana),
+                 "resultados": deque(maxlen=self.ventana),
+                 "fallos_seguidos": 0,
+                 "abierto_hasta": 0.0}
+            self._estado[servicio] = e
+        return e
+
+    def registrar(self, servicio, latencia, ok):
+        with self._lock:
+            e = self._entrada(servicio)
+            e["latencias"].append(latencia)
+            e["resultados"].append(bool(ok))
+            if ok:
+                e["fallos_seguidos"] = 0
+                e["abierto_hasta"] = 0.0
+                return
+            e["fallos_seguidos"] += 1
+            n = len(e["resultados"])
+            tasa = e["resultados"].count(False) / n
+            if (e["fallos_seguidos"] >= self.fallos_para_abrir
+                    or (n >= self.min_muestras and tasa > self.tasa_error_max)):
+                e["abierto_hasta"] = time.monotonic() + self.enfriamiento
+
+    def disponible(self, servicio):
+        with self._lock:
+            e = self._estado.get(servicio)
+            return e is None or time.monotonic() >= e["abierto_hasta"]
+
+    def reservar(self, servicio):
+        """True si se puede llamar al proveedor ahora mismo.
+
+        Con el circuito medio abierto solo devuelve True al primero (la sonda).
+        """
+        with self._lock:
+            e = self._estado.get(servicio)
+            if e is None or not e["abierto_hasta"]:
+                return True
+            ahora = time.monotonic()
+            if ahora < e["abierto_hasta"]:
+                return False
+            e["abierto_hasta"] = ahora + self.enfriamiento
+            return True
+
+    def percentil(self, servicio, p):
+        with self._lock:
+            e = self._estado.get(servicio)
+            lat = sorted(e["latencias"]) if e else []
+        if not lat:
+            return None
+        k = min(len(lat) - 1, max(0, int(round(p / 100.0 * (len(lat) - 1)))))
+        return lat[k]
+
+    def tasa_error(self, servicio):
+        with self._lock:
+            e = self._estado.get(servicio)
+            if not e or not e["resultados"]:
+                return 0.0
+            return e["resultados"].count(False) / len(e["resultados"])
+
+    def ordenar(self, servicios):
+        """Proveedores disponibles, del mas rapido (p95) al mas lento.
+
+        Los que aun no tienen muestras van primero para poder medirlos.
+        """
+        vivos = [s for s in servicios if self.disponible(s)]
+        def clave(s):
+            p95 = self.percentil(s, 95)
+            return (p95 is not None, p95 or 0.0, self.tasa_error(s))
+        return sorted(vivos, key=clave)
+
+    def resumen(self):
+        with self._lock:
+            servicios = list(self._estado)
+        out = {}
+        for s in servicios:
+            with self._lock:
+                e = self._estado[s]
+                muestras = len(e["resultados"])
+                abierto = time.monotonic() < e["abierto_hasta"]
+            out[s] = {"p50": self.percentil(s, 50), "p95": self.percentil(s, 95),
+                      "tasa_error": self.tasa_error(s), "muestras": muestras,
+                      "abierto": abierto}
+        return out
+
+SALUD = SaludProveedores()
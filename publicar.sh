@@ -12,7 +12,7 @@ REPO_DIR="$TEMP_DIR/image_searcher"
 
 # Copiamos toda la carpeta actual excluyendo los archivos que
 # indicamos en la variable EXCLUDE_FILES.
-EXCLUDE_FILES="publicar.sh altas_en_api.org descargas SECRETOS"
+EXCLUDE_FILES="publicar.sh altas_en_api.org descargas .estado SECRETOS"
 rsync -av --exclude=$(echo $EXCLUDE_FILES | tr ' ' '\n' | sed 's/^/--exclude=/') ./ "$REPO_DIR/"
 
 # Cambiamos al directorio del repositorio temporal y hacemos el commit y push.
@@ -36,6 +36,7 @@ EOL
 cat <<EOL > .gitignore
 .venv/
 descargas/
+.estado/
 __pycache__/
 *.pyc
 .vscode/